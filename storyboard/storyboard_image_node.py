@@ -1,8 +1,14 @@
-from typing import Any, List
+from typing import Any, List, NamedTuple
 import io
+import os
 import time
 import hashlib
-import requests
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import httpx
+import numpy as np
 from PIL import Image
 
 from griptape_nodes.exe_types.node_types import DataNode, NodeResolutionState
@@ -12,10 +18,46 @@ from griptape_nodes.exe_types.node_types import BaseNode
 from griptape_nodes.retained_mode.griptape_nodes import GriptapeNodes
 from griptape_nodes.traits.options import Options
 
+# Upper bound on concurrent image fetches (and pooled connections per host)
+MAX_FETCH_WORKERS = 16
+
+# Shared HTTP/2 client so fetches from the same origin multiplex over one connection.
+# httpx needs the optional h2 package for HTTP/2; fall back to HTTP/1.1 without it.
+_HTTP_CLIENT = httpx.Client(
+    http2=importlib.util.find_spec("h2") is not None,
+    timeout=30,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=MAX_FETCH_WORKERS),
+)
+
+# Number of input images kept between runs
+DECODE_CACHE_SIZE = 32
+
+# Mapping of output size options (and the legacy default) to actual resolutions
+_SIZE_MAP = {
+    "4k (3840x2160)": (3840, 2160),
+    "1440p (2560x1440)": (2560, 1440),
+    "1080p (1920x1080)": (1920, 1080),
+    "1920x1080": (1920, 1080),
+    "720p (1280x720)": (1280, 720)
+}
+
+
+class _CachedImage(NamedTuple):
+    """An input image's encoded bytes, plus its decode when that is cheap to keep."""
+
+    data: bytes
+    # Only JPEG decodes are kept; they are scaled down to draft_size by the decoder
+    image: Image.Image | None
+    draft_size: tuple[int, int]
+
 
 class StoryboardImageNode(DataNode):
     def __init__(self, name: str, metadata: dict[Any, Any] | None = None) -> None:
         super().__init__(name, metadata)
+
+        # Input images keyed by content hash, so layout edits skip re-fetching
+        self._decode_cache: OrderedDict[str, _CachedImage] = OrderedDict()
         
         # Input parameter for list of images
         self.add_parameter(
@@ -130,35 +172,46 @@ class StoryboardImageNode(DataNode):
             return
 
         try:
-            # Process the list of images
-            pil_images = []
+            # Reject unsupported items up front so no fetches start for a list we can't use
             for img_item in images_list:
-                if isinstance(img_item, ImageArtifact):
-                    # If it's already an ImageArtifact
-                    img_bytes = img_item.to_bytes()
-                    pil_img = Image.open(io.BytesIO(img_bytes))
-                    pil_images.append(pil_img)
-                elif isinstance(img_item, ImageUrlArtifact):
-                    # If it's an ImageUrlArtifact
-                    response = requests.get(img_item.value, timeout=30)
-                    response.raise_for_status()
-                    pil_img = Image.open(io.BytesIO(response.content))
-                    pil_images.append(pil_img)
-                elif isinstance(img_item, dict) and "url" in img_item:
+                if isinstance(img_item, dict) and "url" in img_item:
                     # If it's a dict with a URL, we'd need to fetch it
                     self.parameter_values["status_message"] = "URL-based images not yet supported"
                     return
-                elif isinstance(img_item, bytes):
-                    # If it's raw bytes
-                    pil_img = Image.open(io.BytesIO(img_item))
-                    pil_images.append(pil_img)
-                else:
+                if not isinstance(img_item, (ImageArtifact, ImageUrlArtifact, bytes)):
                     self.parameter_values["status_message"] = f"Unsupported image format: {type(img_item)}"
                     return
 
             # Get target output size first
             target_size = self._parse_output_size(output_image_size) or (1920, 1080)
-            
+
+            # Let JPEG decoders scale down in the DCT domain to ~2x the grid cell size
+            available_width, available_height = self._cell_size(
+                len(images_list), self._resolve_columns(columns), padding, target_size
+            )
+            draft_size = (max(1, available_width * 2), max(1, available_height * 2))
+
+            # Reuse cached JPEG decodes that are at least as large as this layout needs
+            cache_keys = [self._cache_key(img_item) for img_item in images_list]
+            cached = [self._decode_cache.get(key) for key in cache_keys]
+            pil_images = [self._reusable_image(entry, draft_size) for entry in cached]
+            misses = [idx for idx, pil_img in enumerate(pil_images) if pil_img is None]
+
+            # Decode the remaining images in parallel, fetching only those not cached
+            if misses:
+                with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(misses))) as executor:
+                    loaded = executor.map(
+                        partial(self._load_image, draft_size=draft_size),
+                        [images_list[idx] for idx in misses],
+                        [cached[idx] for idx in misses],
+                    )
+                    for idx, (entry, pil_img) in zip(misses, loaded):
+                        cached[idx] = entry
+                        pil_images[idx] = pil_img
+
+            for key, entry in zip(cache_keys, cached):
+                self._cache_image(key, entry)
+
             # Create the storyboard grid (this creates a storyboard with the right aspect ratio based on images)
             storyboard = self.create_storyboard_grid(
                 pil_images, 
@@ -170,16 +223,19 @@ class StoryboardImageNode(DataNode):
             
             # Convert to ImageUrlArtifact using StaticFilesManager
             buffer = io.BytesIO()
-            storyboard.save(buffer, format="PNG")
+            # Fast Deflate: the storyboard is consumed immediately, not archived
+            storyboard.save(buffer, format="PNG", compress_level=1, optimize=False)
+            # getvalue() hands back the buffer's own bytes object without copying
+            png_bytes = buffer.getvalue()
             
             # Generate a unique filename for the image
             timestamp = int(time.time() * 1000)
-            content_hash = hashlib.md5(buffer.getvalue()).hexdigest()[:8]
+            content_hash = hashlib.blake2b(png_bytes, digest_size=4).hexdigest()
             filename = f"storyboard_{timestamp}_{content_hash}.png"
             
             # Save image using StaticFilesManager and get URL
             static_files_manager = GriptapeNodes.StaticFilesManager()
-            static_url = static_files_manager.save_static_file(buffer.getvalue(), filename)
+            static_url = static_files_manager.save_static_file(png_bytes, filename)
             
             # Create ImageUrlArtifact with the URL
             image_url_artifact = ImageUrlArtifact(value=static_url, name=f"storyboard_{timestamp}")
@@ -192,6 +248,58 @@ class StoryboardImageNode(DataNode):
             self.parameter_values["status_message"] = f"Error generating storyboard: {str(e)}"
             raise
 
+    def _cache_key(self, img_item: Any) -> str:
+        """Build a cache key from the image URL or bytes."""
+        if isinstance(img_item, ImageArtifact):
+            return hashlib.md5(img_item.to_bytes()).hexdigest()
+        if isinstance(img_item, ImageUrlArtifact):
+            return hashlib.md5(img_item.value.encode()).hexdigest()
+        return hashlib.md5(img_item).hexdigest()
+
+    def _cache_image(self, key: str, entry: _CachedImage) -> None:
+        """Store a cached input image, evicting the least recently used entries."""
+        self._decode_cache[key] = entry
+        self._decode_cache.move_to_end(key)
+        while len(self._decode_cache) > DECODE_CACHE_SIZE:
+            self._decode_cache.popitem(last=False)
+
+    def _reusable_image(self, entry: _CachedImage | None, draft_size: tuple[int, int]) -> Image.Image | None:
+        """Return the cached decode if it was drafted at least as large as draft_size."""
+        if entry is None or entry.image is None:
+            return None
+        if entry.draft_size[0] < draft_size[0] or entry.draft_size[1] < draft_size[1]:
+            return None
+        return entry.image
+
+    def _load_image(
+        self, img_item: Any, entry: _CachedImage | None, draft_size: tuple[int, int]
+    ) -> tuple[_CachedImage, Image.Image]:
+        """Fetch (unless cached) and fully decode a single input image."""
+        if entry is not None:
+            # Already fetched on an earlier run
+            img_bytes = entry.data
+        elif isinstance(img_item, ImageArtifact):
+            # If it's already an ImageArtifact
+            img_bytes = img_item.to_bytes()
+        elif isinstance(img_item, ImageUrlArtifact):
+            # If it's an ImageUrlArtifact
+            response = _HTTP_CLIENT.get(img_item.value)
+            response.raise_for_status()
+            img_bytes = response.content
+        else:
+            # If it's raw bytes
+            img_bytes = img_item
+
+        pil_img = Image.open(io.BytesIO(img_bytes))
+        # Only affects JPEGs; the final LANCZOS resize handles exact sizing
+        pil_img.draft("RGB", draft_size)
+        # Decode here so it runs on the worker thread rather than lazily on first use
+        pil_img.load()
+
+        # Other formats decode at full resolution, so only their encoded bytes are kept
+        cached_image = pil_img if pil_img.format == "JPEG" else None
+        return _CachedImage(img_bytes, cached_image, draft_size), pil_img
+
     def create_storyboard_grid(self, images: List[Image.Image], bg_color: str, columns: int, padding: int, target_size: tuple[int, int]) -> Image.Image:
         """Create a grid layout from the provided images and resize to target dimensions."""
         if not images:
@@ -199,11 +307,9 @@ class StoryboardImageNode(DataNode):
             
         # Parse background color
         try:
-            # Handle hex color
+            # Handle hex color: one strict parse of #RRGGBB straight into the three channels
             if bg_color.startswith('#'):
-                r = int(bg_color[1:3], 16)
-                g = int(bg_color[3:5], 16)
-                b = int(bg_color[5:7], 16)
+                r, g, b = bytes.fromhex(bg_color[1:7])
                 bg_color_tuple = (r, g, b)
             else:
                 # Default to black if parsing fails
@@ -212,8 +318,7 @@ class StoryboardImageNode(DataNode):
             bg_color_tuple = (0, 0, 0)
             
         # Ensure columns is valid
-        if not isinstance(columns, int) or columns < 1:
-            columns = 3
+        columns = self._resolve_columns(columns)
             
         # Calculate rows needed
         num_images = len(images)
@@ -223,33 +328,27 @@ class StoryboardImageNode(DataNode):
         target_width, target_height = target_size
         
         # Determine individual image size based on target dimensions
-        # Calculate the maximum size each image can be to fit within the target dimensions
-        available_width = (target_width - (columns + 1) * padding) // columns
-        max_rows = (num_images + columns - 1) // columns  # Ceiling division to get number of rows
-        available_height = (target_height - (max_rows + 1) * padding) // max_rows
+        available_width, available_height = self._cell_size(num_images, columns, padding, target_size)
         
-        # Resize all images to fit within the calculated dimensions
-        resized_images = []
-        for img in images:
-            # Maintain aspect ratio
-            img_width, img_height = img.size
-            aspect_ratio = img_width / img_height
-            
-            if aspect_ratio > 1:  # Wider than tall
-                new_width = available_width
-                new_height = int(new_width / aspect_ratio)
-                if new_height > available_height:
-                    new_height = available_height
-                    new_width = int(new_height * aspect_ratio)
-            else:  # Taller than wide or square
-                new_height = available_height
-                new_width = int(new_height * aspect_ratio)
-                if new_width > available_width:
-                    new_width = available_width
-                    new_height = int(new_width / aspect_ratio)
-                    
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
-            resized_images.append(resized_img)
+        # Compute every fitted size in one pass, maintaining aspect ratio
+        sizes = np.array([img.size for img in images], dtype=np.float64)
+        aspect_ratios = sizes[:, 0] / sizes[:, 1]
+        width_fit_heights = (available_width / aspect_ratios).astype(np.int64)
+        height_fit_widths = (available_height * aspect_ratios).astype(np.int64)
+        # Wider than tall: fit to width unless too tall; otherwise fit to height unless too wide
+        use_width_fit = np.where(
+            aspect_ratios > 1,
+            width_fit_heights <= available_height,
+            height_fit_widths > available_width,
+        )
+        new_widths = np.where(use_width_fit, available_width, height_fit_widths)
+        new_heights = np.where(use_width_fit, width_fit_heights, available_height)
+
+        # Resize all images in parallel; Pillow releases the GIL while resampling
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, num_images)) as executor:
+            resized_images = list(
+                executor.map(self._resize_image, images, new_widths.tolist(), new_heights.tolist())
+            )
             
         # Create the canvas with the exact target dimensions
         final_image = Image.new('RGB', target_size, color=bg_color_tuple)
@@ -262,8 +361,9 @@ class StoryboardImageNode(DataNode):
         grid_width = columns * base_width + (columns + 1) * padding
         grid_height = rows * base_height + (rows + 1) * padding
         
-        # Create a grid image for the resized images
-        grid_image = Image.new('RGB', (grid_width, grid_height), color=bg_color_tuple)
+        # Center the grid on the final canvas
+        paste_x = max(0, (target_width - grid_width) // 2)
+        paste_y = max(0, (target_height - grid_height) // 2)
         
         # Calculate center offset to center the grid 
         # (not needed for full rows, but applies to the last row if it's not full)
@@ -271,30 +371,71 @@ class StoryboardImageNode(DataNode):
         if last_row_items == 0:
             last_row_items = columns  # Last row is full
         
-        # Place each image in the grid
-        for idx, img in enumerate(resized_images):
-            row = idx // columns
-            col = idx % columns
-            
-            # Center the items in the last row if it's not a full row
-            if row == rows - 1 and last_row_items < columns:
-                # Calculate centering offset for the last row
-                offset = (columns - last_row_items) * (base_width + padding) // 2
-                x = col * (base_width + padding) + padding + offset
-            else:
-                # Normal grid placement
-                x = col * (base_width + padding) + padding
-                
-            y = row * (base_height + padding) + padding
-            grid_image.paste(img, (x, y))
-            
-        # Center the grid on the final canvas
-        paste_x = max(0, (target_width - grid_width) // 2)
-        paste_y = max(0, (target_height - grid_height) // 2)
-        final_image.paste(grid_image, (paste_x, paste_y))
+        # Compute every grid position up front, then place each image directly onto the final canvas
+        positions = self._grid_positions(num_images, columns, rows, base_width, base_height, padding, last_row_items)
+        for img, (x, y) in zip(resized_images, positions.tolist()):
+            # Clip tiles larger than the first one to the grid bounds
+            visible_width = min(img.width, grid_width - x)
+            visible_height = min(img.height, grid_height - y)
+            if visible_width <= 0 or visible_height <= 0:
+                continue
+            if (visible_width, visible_height) != img.size:
+                img = img.crop((0, 0, visible_width, visible_height))
+            final_image.paste(img, (paste_x + x, paste_y + y))
             
         return final_image
 
+    def _grid_positions(
+        self,
+        num_images: int,
+        columns: int,
+        rows: int,
+        base_width: int,
+        base_height: int,
+        padding: int,
+        last_row_items: int,
+    ) -> np.ndarray:
+        """Return the (x, y) offset of each image within the grid as an (n, 2) array."""
+        idx = np.arange(num_images)
+        row = idx // columns
+        col = idx % columns
+
+        x = col * (base_width + padding) + padding
+        y = row * (base_height + padding) + padding
+
+        # Center the items in the last row if it's not a full row
+        if last_row_items < columns:
+            offset = (columns - last_row_items) * (base_width + padding) // 2
+            x = np.where(row == rows - 1, x + offset, x)
+
+        return np.stack((x, y), axis=1)
+
+    def _resize_image(self, img: Image.Image, new_width: int, new_height: int) -> Image.Image:
+        """Resize a single image to its fitted grid cell size."""
+        # reducing_gap makes Pillow BOX-reduce to ~2x the target before the LANCZOS pass.
+        # Image.reduce doesn't support 16-bit modes (e.g. 16-bit greyscale PNGs), so skip it there.
+        reducing_gap = None if img.mode.startswith("I;16") else 2.0
+        resized_img = img.resize((new_width, new_height), Image.LANCZOS, reducing_gap=reducing_gap)
+
+        # Convert once on the small resized image rather than implicitly on every paste
+        if resized_img.mode not in ("RGB", "L"):
+            resized_img = resized_img.convert("RGB")
+        return resized_img
+
+    def _resolve_columns(self, columns: Any) -> int:
+        """Return a valid column count, falling back to 3."""
+        if not isinstance(columns, int) or columns < 1:
+            return 3
+        return columns
+
+    def _cell_size(self, num_images: int, columns: int, padding: int, target_size: tuple[int, int]) -> tuple[int, int]:
+        """Calculate the maximum size each image can be to fit within the target dimensions."""
+        target_width, target_height = target_size
+        rows = (num_images + columns - 1) // columns  # Ceiling division
+        available_width = (target_width - (columns + 1) * padding) // columns
+        available_height = (target_height - (rows + 1) * padding) // rows
+        return available_width, available_height
+
     def mark_for_processing(self) -> None:
         """Mark this node as needing to be processed."""
         # Reset the node's state to UNRESOLVED
@@ -306,6 +447,10 @@ class StoryboardImageNode(DataNode):
                 self.parameter_output_values[param.name] = None
 
     def after_value_set(self, parameter: Parameter, value: Any) -> None:
+        # New input images invalidate the decode cache
+        if parameter.name == "images":
+            self._decode_cache.clear()
+
         # If this parameter change requires reprocessing
         if parameter.name in ["images", "background_color", "columns", "padding", "output_image_size"]:
             self.mark_for_processing()
@@ -346,14 +491,5 @@ class StoryboardImageNode(DataNode):
         
     def _parse_output_size(self, output_size: str) -> tuple[int, int] | None:
         """Parse the output size parameter into a tuple of width and height."""
-        # Define a mapping of options to actual resolutions
-        size_map = {
-            "4k (3840x2160)": (3840, 2160),
-            "1920x1080": (1920, 1080),
-            "1440p (2560x1440)": (2560, 1440),
-            "720p (1280x720)": (1280, 720)
-        }
-        
-        # Return the mapped value or None if not found
-        return size_map.get(output_size)
+        return _SIZE_MAP.get(output_size)
         